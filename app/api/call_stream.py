@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.exc import IntegrityError
-from app.db.session import get_db
-from app.db.models import Call, Packet
-from app.core.states import CallState
-from app.services.processor import ai_processor
-from typing import Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, status
+from app.services.job_queue import ai_jobs
+from app.services.packet_buffer import packet_buffer, write_packets
+from app.services.call_sessions import call_sessions
+from app.services.ingest import accept_packet, offer_packet, complete_call, CallNotFound
+from app.services.reorder import ACCEPTED, DUPLICATE
+from app.core.config import settings
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,82 +18,104 @@ class PacketPayload(BaseModel):
     data: str
     timestamp: float
 
+class BatchPacket(PacketPayload):
+    call_id: str
+
+class BatchPacketPayload(BaseModel):
+    packets: List[BatchPacket] = Field(..., min_length=1, max_length=settings.BATCH_INGEST_MAX_PACKETS)
+
 @router.post("/call/stream/{call_id}", status_code=status.HTTP_202_ACCEPTED)
 async def ingest_packet(
     call_id: str, 
-    payload: PacketPayload, 
-    db: AsyncSession = Depends(get_db)
+    payload: PacketPayload
 ):
     """
     Ingests a single packet of call data.
     """
-    # 1. Check/Create Session
-    # Optimization: Try to get it first
-    result = await db.execute(select(Call).where(Call.call_id == call_id))
-    call = result.scalars().first()
-    
-    if not call:
-        try:
-            call = Call(call_id=call_id, status=CallState.IN_PROGRESS)
-            db.add(call)
-            await db.commit()
-            await db.refresh(call)
-        except IntegrityError:
-            # Race condition: Another request created it just now
-            logger.warning(f">>> RACE CONDITION CAUGHT! handling concurrency for {call_id} <<<")
-            await db.rollback()
-            result = await db.execute(select(Call).where(Call.call_id == call_id))
-            call = result.scalars().first()
-            if not call:
-                # Should practically never happen unless deleted immediately
-                raise HTTPException(status_code=500, detail="Concurrency Error: Could not fetch call after uniqueness failure")
-    
-    # 2. Validation (Non-blocking warning)
-    expected_sequence = call.last_sequence + 1
-    if payload.sequence != expected_sequence:
-         logger.warning(f"Packet Sequence Mismatch for {call_id}: Expected {expected_sequence}, Got {payload.sequence}")
+    # Live calls are served from the in-memory registry; the DB is only hit on first packet
+    try:
+        session, outcome = await accept_packet(call_id, payload.sequence, payload.data, payload.timestamp)
+    except RuntimeError as e:
+        # Should practically never happen unless deleted immediately
+        raise HTTPException(status_code=500, detail=f"Concurrency Error: {e}")
     
-    # 3. Store Packet
-    packet = Packet(
-        call_id=call.call_id,
-        sequence=payload.sequence,
-        data=payload.data,
-        timestamp=payload.timestamp
-    )
-    db.add(packet)
+    return {"status": "accepted", "result": outcome, "ack": session.last_sequence}
+
+@router.post("/call/stream", status_code=status.HTTP_200_OK)
+async def ingest_packet_batch(payload: BatchPacketPayload):
+    """
+    Ingests many packets, optionally for several calls, in one request.
+
+    Every packet goes through its call's reorder window in request order, and
+    whatever is released is written with a single bulk insert and one commit.
+    Packets held for reordering are written once their gap fills (or times out).
+    """
+    # 1. Get/Create Sessions (one lookup per distinct call)
+    call_ids = list(dict.fromkeys(packet.call_id for packet in payload.packets))
+    try:
+        await asyncio.gather(*[call_sessions.get_or_create(cid) for cid in call_ids])
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=f"Concurrency Error: {e}")
     
-    # Update sequence tracking
-    if payload.sequence > call.last_sequence:
-        call.last_sequence = payload.sequence
+    # 2. Sequence checks for the whole batch
+    batch: Dict[str, List[dict]] = {}
+    results = []
+    counts = {"accepted": 0, "duplicate": 0, "out_of_order": 0}
+    for packet in payload.packets:
+        session = call_sessions.peek(packet.call_id) or await call_sessions.get_or_create(packet.call_id)
+        outcome, released = offer_packet(session, packet.sequence, packet.data, packet.timestamp)
+        for row in released:
+            batch.setdefault(row["call_id"], []).append(row)
         
-    await db.commit()
+        result = {ACCEPTED: "accepted", DUPLICATE: "duplicate"}.get(outcome, "out_of_order")
+        counts[result] += 1
+        results.append({"call_id": packet.call_id, "sequence": packet.sequence, "result": result})
+    
+    # 3. Store Packets (single bulk insert, one commit)
+    if batch:
+        try:
+            await write_packets(batch)
+        except Exception:
+            # The windows have already released these rows; hand them to the buffer to retry
+            logger.exception("Batch packet write failed, deferring to write-behind buffer")
+            await packet_buffer.add([row for rows in batch.values() for row in rows])
+            raise HTTPException(status_code=503, detail="Packets queued for retry")
     
-    return {"status": "accepted"}
+    return {**counts, "results": results}
 
 @router.post("/call/{call_id}/end", status_code=status.HTTP_200_OK)
 async def end_call(
-    call_id: str, 
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    call_id: str,
+    priority: int = 0
 ):
     """
-    Marks a call as COMPLETED and triggers background AI processing.
+    Marks a call as COMPLETED and queues a durable AI processing job.
+    Lower `priority` values are processed first.
     """
-    result = await db.execute(select(Call).where(Call.call_id == call_id))
-    call = result.scalars().first()
-    
-    if not call:
+    try:
+        completed, state = await complete_call(call_id, priority)
+    except CallNotFound:
         raise HTTPException(status_code=404, detail="Call not found")
         
-    if call.status in [CallState.COMPLETED, CallState.ARCHIVED, CallState.FAILED]:
-        return {"status": "already_completed", "state": call.status}
-
-    # Transition: IN_PROGRESS -> COMPLETED
-    call.status = CallState.COMPLETED
-    await db.commit()
+    if not completed:
+        return {"status": "already_completed", "state": state}
     
-    # Trigger Background AI Processing
-    # We pass the ID, not the object, to avoid async session attachment issues in the background task
-    background_tasks.add_task(ai_processor.process_call_background, call_id)
+    # The job row is committed; wake the local feeder instead of waiting for its next poll
+    ai_jobs.notify()
     
     return {"status": "processing_initiated", "call_id": call_id}
+
+@router.get("/ingest/stats", status_code=status.HTTP_200_OK)
+async def ingest_stats():
+    """
+    Exposes packet buffer counters (flush latency, batch sizes) for tuning.
+    """
+    return {"pending": packet_buffer.pending, **packet_buffer.stats.as_dict()}
+
+@router.get("/ai/jobs/stats", status_code=status.HTTP_200_OK)
+async def ai_job_stats():
+    """
+    Exposes AI worker pool counters (queue depth, wait and run times) and
+    job counts per state from the durable queue.
+    """
+    return {**ai_jobs.snapshot(), "jobs": await ai_jobs.store.counts()}
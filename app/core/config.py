@@ -26,6 +26,41 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "ai_call_service"
 
+    # Packet ingestion write-behind buffer
+    # Packets are acknowledged immediately and flushed to the DB in bulk
+    PACKET_BUFFER_MAX_BATCH_SIZE: int = 500
+    PACKET_BUFFER_MAX_DELAY_MS: int = 50
+    PACKET_BUFFER_MAX_PENDING: int = 20000
+
+    # Upper bound on packets accepted by one batch ingest request
+    BATCH_INGEST_MAX_PACKETS: int = 1000
+
+    # WebSocket ingestion: packets a client may have in flight, and ack cadence
+    WS_INGEST_CREDIT_WINDOW: int = 256
+    WS_INGEST_ACK_INTERVAL: int = 32
+
+    # Per-call reorder window: max sequences ahead of the last in-order packet,
+    # and how long a gap may stay open before it is recorded as missing
+    REORDER_WINDOW_SIZE: int = 1024
+    REORDER_GAP_TIMEOUT_MS: int = 2000
+
+    # In-memory call session registry (LRU + idle TTL)
+    CALL_SESSION_CACHE_SIZE: int = 10000
+    CALL_SESSION_TTL_SECONDS: float = 300.0
+
+    # AI aggregation: packets read per keyset chunk, and max characters per AI request
+    AI_PACKET_CHUNK_SIZE: int = 500
+    AI_WINDOW_MAX_CHARS: int = 16000
+
+    # AI processing worker pool, fed from the durable `jobs` table
+    AI_WORKERS: int = 4
+    # Lease must outlast the worst-case AI call including retries
+    AI_JOB_LEASE_SECONDS: float = 300.0
+    AI_JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    AI_JOB_DRAIN_TIMEOUT_SECONDS: float = 30.0
+    # call_ids shaped like "<tenant>:<id>" are fair-shared per tenant
+    AI_JOB_TENANT_SEPARATOR: str = ":"
+
     model_config = SettingsConfigDict(env_file=".env")
 
 settings = Settings()
@@ -16,3 +16,18 @@ class CallState(str, Enum):
     PROCESSING_AI = "PROCESSING_AI"
     FAILED = "FAILED"
     ARCHIVED = "ARCHIVED"
+
+class JobState(str, Enum):
+    """
+    Lifecycle of a durable AI processing job.
+    
+    States:
+    - PENDING: Waiting to be claimed by a worker.
+    - LEASED: Claimed by a worker until its lease expires.
+    - DONE: Processing finished (the call itself may be ARCHIVED or FAILED).
+    - FAILED: The worker crashed while running the job.
+    """
+    PENDING = "PENDING"
+    LEASED = "LEASED"
+    DONE = "DONE"
+    FAILED = "FAILED"
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
-from app.core.states import CallState
+from app.core.states import CallState, JobState
 
 class Call(Base):
     """
@@ -19,6 +19,11 @@ class Call(Base):
     # last_sequence integer field to track packet order
     last_sequence = Column(Integer, default=0, nullable=False)
     
+    # Gap stats from the per-call reorder window
+    missing_packets = Column(Integer, default=0, nullable=False)
+    duplicate_packets = Column(Integer, default=0, nullable=False)
+    missing_ranges = Column(Text, nullable=True)  # JSON list of [start, end] sequence ranges
+    
     # Optional transcript and sentiment fields (AI results)
     transcript = Column(Text, nullable=True)
     sentiment = Column(String, nullable=True)
@@ -40,8 +45,8 @@ class Packet(Base):
     # Auto-increment primary key
     id = Column(Integer, primary_key=True, index=True)
     
-    # Foreign key to call_id, Indexed
-    call_id = Column(String, ForeignKey("calls.call_id"), nullable=False, index=True)
+    # Foreign key to call_id
+    call_id = Column(String, ForeignKey("calls.call_id"), nullable=False)
     
     # sequence, data, timestamp fields
     sequence = Column(Integer, nullable=False)
@@ -50,3 +55,42 @@ class Packet(Base):
 
     # Relationships
     call = relationship("Call", back_populates="packets")
+
+    __table_args__ = (
+        # Serves per-call lookups and keyset reads in sequence order
+        Index("ix_packets_call_sequence", "call_id", "sequence"),
+    )
+
+
+class Job(Base):
+    """
+    Durable AI processing job, claimed by workers under a time-limited lease.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    call_id = Column(String, ForeignKey("calls.call_id"), nullable=False)
+    status = Column(SQLAlchemyEnum(JobState), default=JobState.PENDING, nullable=False)
+    
+    # Scheduling: lower priority runs first, tenants are fair-shared by workers
+    priority = Column(Integer, default=0, nullable=False)
+    tenant = Column(String, default="default", nullable=False)
+    
+    # Lease: which worker holds the job and until when (epoch seconds)
+    attempts = Column(Integer, default=0, nullable=False)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(Float, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Claim order scan
+        Index("ix_jobs_claim", "status", "priority", "id"),
+        # At most one active (pending or leased) job per call
+        Index(
+            "uq_jobs_active_call", "call_id", unique=True,
+            sqlite_where=status.in_([JobState.PENDING, JobState.LEASED]),
+            postgresql_where=status.in_([JobState.PENDING, JobState.LEASED]),
+        ),
+    )
@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from app.core.config import settings
-from app.websocket import supervisor
+from app.websocket import supervisor, call_ingest
 from app.api import call_stream
 from app.db.session import engine
 from app.db.base import Base
+from app.services.packet_buffer import packet_buffer
+from app.services.job_queue import ai_jobs
 
 from contextlib import asynccontextmanager
 
@@ -12,8 +14,14 @@ async def lifespan(app: FastAPI):
     # Startup: create tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    packet_buffer.start()
+    # Re-queue AI work orphaned by a previous crash before workers start claiming
+    await ai_jobs.recover()
+    ai_jobs.start()
     yield
-    # Shutdown
+    # Shutdown: persist buffered packets and drain AI jobs before closing the engine
+    await packet_buffer.stop()
+    await ai_jobs.stop(drain_timeout=settings.AI_JOB_DRAIN_TIMEOUT_SECONDS)
     await engine.dispose()
 
 app = FastAPI(
@@ -23,6 +31,7 @@ app = FastAPI(
 )
 
 app.include_router(supervisor.router, prefix="/stream", tags=["websocket_stream"])
+app.include_router(call_ingest.router, prefix="/stream", tags=["websocket_stream"])
 app.include_router(call_stream.router, prefix="/v1", tags=["call_stream"])
 
 @app.get("/")
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from sqlalchemy.future import select
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.states import CallState
+from app.db.models import Call
+from app.db.session import AsyncSessionLocal
+from app.services.packet_buffer import packet_buffer
+from app.services.reorder import ReorderWindow
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CallSession:
+    """
+    In-memory view of a live call, kept so the ingest hot path avoids the DB.
+    """
+    call_id: str
+    status: CallState
+    window: ReorderWindow
+    last_seen: float = field(default_factory=time.monotonic)
+
+    @property
+    def last_sequence(self) -> int:
+        """
+        Highest sequence released to storage in order (gaps may have been skipped).
+        """
+        return self.window.base
+
+class CallSessionRegistry:
+    """
+    Bounded LRU of live call sessions with TTL eviction for idle calls.
+
+    The DB stays the source of truth: a session is loaded (or the call row created)
+    on first use, `last_sequence` is persisted by the packet buffer on flush, and
+    state transitions are mirrored here via `set_status`. Packets still held in
+    an evicted session's reorder window are handed to the packet buffer.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, CallSession]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def peek(self, call_id: str) -> Optional[CallSession]:
+        """
+        Returns the cached session without touching LRU order or TTL.
+        """
+        return self._sessions.get(call_id)
+
+    def get(self, call_id: str) -> Optional[CallSession]:
+        """
+        Returns the cached session, refreshing its LRU position, or None.
+        """
+        now = time.monotonic()
+        session = self._sessions.get(call_id)
+        if session is not None:
+            if now - session.last_seen > self.ttl:
+                self._drop(call_id)
+                return None
+            session.last_seen = now
+            self._sessions.move_to_end(call_id)
+        return session
+
+    async def get_or_create(self, call_id: str) -> CallSession:
+        """
+        Returns the session for `call_id`, creating the call row if needed.
+
+        Concurrent first packets for the same call share a single load task,
+        so only one of them touches the DB.
+        """
+        session = self.get(call_id)
+        if session is not None:
+            return session
+
+        task = self._loading.get(call_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(call_id))
+            self._loading[call_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(call_id, None))
+        return await asyncio.shield(task)
+
+    def set_status(self, call_id: str, status: CallState):
+        """
+        Mirrors a committed state transition. Uncached calls are left alone.
+        """
+        session = self._sessions.get(call_id)
+        if session is not None:
+            session.status = status
+
+    def discard(self, call_id: str):
+        if call_id in self._sessions:
+            self._drop(call_id)
+
+    async def _load(self, call_id: str) -> CallSession:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Call).where(Call.call_id == call_id))
+            call = result.scalars().first()
+
+            if not call:
+                try:
+                    call = Call(call_id=call_id, status=CallState.IN_PROGRESS, last_sequence=0)
+                    db.add(call)
+                    await db.commit()
+                except IntegrityError:
+                    # Race condition: another worker process created it just now
+                    logger.warning(f">>> RACE CONDITION CAUGHT! handling concurrency for {call_id} <<<")
+                    await db.rollback()
+                    result = await db.execute(select(Call).where(Call.call_id == call_id))
+                    call = result.scalars().first()
+                    if not call:
+                        raise RuntimeError(f"Could not fetch call {call_id} after uniqueness failure")
+
+        window = ReorderWindow(
+            base=call.last_sequence,
+            size=settings.REORDER_WINDOW_SIZE,
+            gap_timeout=settings.REORDER_GAP_TIMEOUT_MS / 1000,
+        )
+        session = CallSession(call_id=call.call_id, status=call.status, window=window)
+        self._put(session)
+        return session
+
+    def _put(self, session: CallSession):
+        self._sessions[session.call_id] = session
+        self._sessions.move_to_end(session.call_id)
+        self._evict()
+
+    def _evict(self):
+        now = time.monotonic()
+        # Oldest entries sit at the front; stop at the first one that is still fresh
+        while self._sessions:
+            call_id, session = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_size or now - session.last_seen > self.ttl:
+                self._drop(call_id)
+            else:
+                break
+
+    def _drop(self, call_id: str):
+        session = self._sessions.pop(call_id)
+        # Don't lose early arrivals still waiting in the reorder window
+        for packet in session.window.drain():
+            packet_buffer.enqueue(packet)
+
+# Singleton instance
+call_sessions = CallSessionRegistry(
+    max_size=settings.CALL_SESSION_CACHE_SIZE,
+    ttl=settings.CALL_SESSION_TTL_SECONDS,
+)
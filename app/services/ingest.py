@@ -0,0 +1,104 @@
+import json
+import logging
+from typing import List, Tuple
+from sqlalchemy.future import select
+from app.core.states import CallState
+from app.db.models import Call
+from app.db.session import AsyncSessionLocal
+from app.services.call_sessions import call_sessions, CallSession
+from app.services.packet_buffer import packet_buffer
+from app.services.job_queue import new_job
+from app.services.reorder import ReorderWindow, DUPLICATE, HELD
+
+logger = logging.getLogger(__name__)
+
+class CallNotFound(Exception):
+    """Raised when ending a call that was never started."""
+    pass
+
+def gap_values(window: ReorderWindow) -> dict:
+    """
+    Column values exposing a reorder window's gap stats on the Call row.
+    """
+    stats = window.stats()
+    stats["missing_ranges"] = json.dumps(stats["missing_ranges"]) if stats["missing_ranges"] else None
+    return stats
+
+def offer_packet(session: CallSession, sequence: int, data: str, timestamp: float) -> Tuple[str, List[dict]]:
+    """
+    Runs a packet through the call's reorder window.
+
+    Returns the outcome and the packet rows released in sequence order. Gap stats
+    are staged on the packet buffer whenever they change.
+    """
+    window = session.window
+    before = (window.missing, window.duplicates)
+    outcome, released = window.offer(sequence, {
+        "call_id": session.call_id,
+        "sequence": sequence,
+        "data": data,
+        "timestamp": timestamp,
+    })
+
+    if outcome == DUPLICATE:
+        logger.info(f"Duplicate packet dropped for {session.call_id}: sequence {sequence}")
+    elif outcome == HELD:
+        logger.debug(f"Packet held for reordering for {session.call_id}: sequence {sequence}, released up to {window.base}")
+
+    if (window.missing, window.duplicates) != before:
+        packet_buffer.set_call_values(session.call_id, gap_values(window))
+    return outcome, released
+
+async def accept_packet(call_id: str, sequence: int, data: str, timestamp: float) -> Tuple[CallSession, str]:
+    """
+    Shared ingest path for HTTP and WebSocket packets.
+
+    Resolves the call session (creating the call on first packet), reorders and
+    dedupes the packet, and queues whatever is released on the write-behind buffer.
+    """
+    session = await call_sessions.get_or_create(call_id)
+    outcome, released = offer_packet(session, sequence, data, timestamp)
+    if released:
+        await packet_buffer.add(released)
+    return session, outcome
+
+async def complete_call(call_id: str, priority: int = 0) -> Tuple[bool, CallState]:
+    """
+    Flushes a call's buffered packets and transitions it to COMPLETED.
+
+    Packets still held for reordering are released first and the remaining gaps
+    are recorded as missing. The AI job is inserted in the same commit as the
+    transition, so a completed call can never be left without pending work.
+    Returns (completed, state): `completed` is False when the call had already
+    finished and no new job was created.
+
+    Raises:
+        CallNotFound: If no such call exists.
+    """
+    session = call_sessions.peek(call_id)
+    if session is not None:
+        released = session.window.drain()
+        if released:
+            await packet_buffer.add(released)
+        packet_buffer.set_call_values(call_id, gap_values(session.window))
+
+    # Make sure every buffered packet is persisted before AI processing reads them
+    await packet_buffer.flush(call_id)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Call).where(Call.call_id == call_id))
+        call = result.scalars().first()
+
+        if not call:
+            raise CallNotFound(call_id)
+
+        # PROCESSING_AI already has an active job; the unique index would reject another
+        if call.status in [CallState.COMPLETED, CallState.PROCESSING_AI, CallState.ARCHIVED, CallState.FAILED]:
+            return False, call.status
+
+        # Transition: IN_PROGRESS -> COMPLETED
+        call.status = CallState.COMPLETED
+        db.add(new_job(call_id, priority))
+        await db.commit()
+        call_sessions.set_status(call_id, CallState.COMPLETED)
+        return True, CallState.COMPLETED
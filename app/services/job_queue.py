@@ -0,0 +1,392 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+from sqlalchemy import exists, func, update
+from sqlalchemy.future import select
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.states import CallState, JobState
+from app.db.models import Call, Job
+from app.db.session import AsyncSessionLocal
+from app.services.processor import ai_processor
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATES = [JobState.PENDING, JobState.LEASED]
+
+def tenant_of(call_id: str) -> str:
+    """
+    Tenant owning a call, taken from the call_id prefix (`<tenant>:<id>`).
+    """
+    tenant, sep, _ = call_id.partition(settings.AI_JOB_TENANT_SEPARATOR)
+    return tenant if sep else "default"
+
+def new_job(call_id: str, priority: int = 0) -> Job:
+    """
+    Builds a pending job row, to be added in the same transaction as the
+    state change that requires it (so the two can never diverge).
+    """
+    return Job(call_id=call_id, status=JobState.PENDING, priority=priority, tenant=tenant_of(call_id), attempts=0)
+
+@dataclass
+class AIJob:
+    job_id: int
+    call_id: str
+    priority: int = 0  # Lower runs first
+    tenant: str = "default"
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+@dataclass
+class JobStats:
+    """
+    Counters for queue tuning: throughput, wait time and run time.
+    """
+    submitted: int = 0
+    claimed: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": 1000 * self.total_wait_seconds / finished if finished else 0.0,
+            "max_wait_ms": 1000 * self.max_wait_seconds,
+            "avg_run_ms": 1000 * self.total_run_seconds / finished if finished else 0.0,
+        }
+
+class JobStore:
+    """
+    SQL side of the durable queue: enqueue, lease-based claim, completion and recovery.
+
+    Claiming is a single `UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING`.
+    On Postgres the subquery uses `FOR UPDATE SKIP LOCKED`, so concurrent claimers
+    skip each other's rows instead of blocking; SQLite ignores the locking clause
+    but serializes writers, and the `status = PENDING` guard keeps the claim atomic.
+    """
+
+    async def add(self, call_id: str, priority: int = 0) -> bool:
+        """
+        Enqueues a job. Returns False if the call already has an active job.
+        """
+        async with AsyncSessionLocal() as session:
+            session.add(new_job(call_id, priority))
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return False
+        return True
+
+    async def claim(self, owner: str, limit: int, lease_seconds: float) -> List[AIJob]:
+        candidates = (
+            select(Job.id)
+            .where(Job.status == JobState.PENDING)
+            .order_by(Job.priority, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id.in_(candidates.scalar_subquery()), Job.status == JobState.PENDING)
+            .values(
+                status=JobState.LEASED,
+                lease_owner=owner,
+                lease_expires_at=time.time() + lease_seconds,
+                attempts=Job.attempts + 1,
+            )
+            .returning(Job.id, Job.call_id, Job.priority, Job.tenant)
+            .execution_options(synchronize_session=False)
+        )
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+        return [AIJob(job_id=r.id, call_id=r.call_id, priority=r.priority, tenant=r.tenant) for r in rows]
+
+    async def finish(self, job_id: int, owner: str, state: JobState) -> bool:
+        """
+        Marks a leased job as finished. A no-op if the lease was lost meanwhile.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.lease_owner == owner, Job.status == JobState.LEASED)
+                .values(status=state, lease_expires_at=None)
+            )
+            await session.commit()
+        return bool(result.rowcount)
+
+    async def release(self, owner: str) -> int:
+        """
+        Returns every job leased by `owner` to the queue (graceful shutdown).
+        """
+        return await self._requeue(Job.lease_owner == owner)
+
+    async def release_expired(self) -> int:
+        """
+        Returns jobs whose lease ran out (their worker died) to the queue.
+        """
+        return await self._requeue(Job.lease_expires_at < time.time())
+
+    async def _requeue(self, condition) -> int:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.status == JobState.LEASED, condition)
+                .values(status=JobState.PENDING, lease_owner=None, lease_expires_at=None)
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def recover_orphans(self) -> int:
+        """
+        Enqueues calls left in COMPLETED / PROCESSING_AI without an active job,
+        e.g. work accepted before the durable queue existed.
+        """
+        active = select(Job.id).where(Job.call_id == Call.call_id, Job.status.in_(ACTIVE_JOB_STATES))
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Call.call_id).where(
+                    Call.status.in_([CallState.COMPLETED, CallState.PROCESSING_AI]),
+                    ~exists(active),
+                )
+            )
+            call_ids = result.scalars().all()
+
+        recovered = 0
+        for call_id in call_ids:
+            # Another node may be recovering the same call; the unique index decides
+            if await self.add(call_id):
+                recovered += 1
+        return recovered
+
+    async def counts(self) -> Dict[str, int]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Job.status, func.count()).group_by(Job.status))
+            return {state.value: count for state, count in result.all()}
+
+class AIJobQueue:
+    """
+    Pool of async workers pulling durable AI jobs from the `jobs` table.
+
+    A feeder claims pending jobs under a lease whenever workers are free, so
+    several processes or nodes can share the table without double-processing.
+    Claimed jobs go to a local scheduler that serves priorities in order and
+    round-robins tenants within a priority, so a burst from one tenant cannot
+    starve the others.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], Awaitable[None]],
+        workers: int,
+        lease_seconds: float,
+        poll_interval: float,
+        store: Optional[JobStore] = None,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.store = store or JobStore()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats = JobStats()
+
+        self._buckets: Dict[int, "OrderedDict[str, Deque[AIJob]]"] = {}
+        self._depth = 0
+        self._running: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._feeder: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._poke: Optional[asyncio.Event] = None
+        self._closing = False
+
+    @property
+    def depth(self) -> int:
+        """
+        Jobs claimed by this process and waiting for a free worker.
+        """
+        return self._depth
+
+    async def submit(self, call_id: str, priority: int = 0) -> bool:
+        """
+        Enqueues AI processing for a call. Returns False if it is already queued.
+        """
+        added = await self.store.add(call_id, priority)
+        if added:
+            self.stats.submitted += 1
+            self.notify()
+        return added
+
+    def notify(self):
+        """
+        Tells the feeder new jobs were committed, instead of waiting for the next poll.
+        """
+        if self._poke is not None:
+            self._poke.set()
+
+    def snapshot(self) -> dict:
+        per_tenant: Dict[str, int] = {}
+        for tenants in self._buckets.values():
+            for tenant, jobs in tenants.items():
+                per_tenant[tenant] = per_tenant.get(tenant, 0) + len(jobs)
+        return {
+            "owner": self.owner,
+            "workers": self.workers,
+            "depth": self.depth,
+            "in_flight": len(self._running),
+            "depth_per_tenant": per_tenant,
+            **self.stats.as_dict(),
+        }
+
+    async def recover(self):
+        """
+        Startup recovery: re-queues expired leases and orphaned calls.
+        """
+        expired = await self.store.release_expired()
+        orphans = await self.store.recover_orphans()
+        if expired or orphans:
+            logger.warning(f"Recovered {expired} expired AI job leases and {orphans} orphaned calls")
+
+    def _enqueue(self, job: AIJob):
+        tenants = self._buckets.setdefault(job.priority, OrderedDict())
+        tenants.setdefault(job.tenant, deque()).append(job)
+        self._depth += 1
+
+    def _next_job(self) -> Optional[AIJob]:
+        for priority in sorted(self._buckets):
+            tenants = self._buckets[priority]
+            # Round-robin: take the head tenant's oldest job, then rotate it to the back
+            tenant, jobs = next(iter(tenants.items()))
+            job = jobs.popleft()
+            if jobs:
+                tenants.move_to_end(tenant)
+            else:
+                del tenants[tenant]
+            if not tenants:
+                del self._buckets[priority]
+            self._depth -= 1
+            return job
+        return None
+
+    async def _feed(self):
+        while True:
+            self._poke.clear()
+            free = self.workers - len(self._running) - self._depth
+            claimed = []
+            if free > 0:
+                try:
+                    claimed = await self.store.claim(self.owner, free, self.lease_seconds)
+                except Exception as e:
+                    logger.error(f"Failed to claim AI jobs: {e}")
+            for job in claimed:
+                self._enqueue(job)
+            if claimed:
+                self.stats.claimed += len(claimed)
+                self._wakeup.set()
+                if len(claimed) == free:
+                    continue  # There may be more pending work
+
+            try:
+                await asyncio.wait_for(self._poke.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                # Idle poll: pick up leases abandoned by crashed workers elsewhere
+                try:
+                    await self.store.release_expired()
+                except Exception as e:
+                    logger.error(f"Failed to release expired AI job leases: {e}")
+
+    async def _worker(self, index: int):
+        while True:
+            job = self._next_job()
+            if job is None:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            started = time.monotonic()
+            waited = started - job.enqueued_at
+            self.stats.total_wait_seconds += waited
+            self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+
+            self._running.add(job.call_id)
+            try:
+                await self.handler(job.call_id)
+                state = JobState.DONE
+                self.stats.completed += 1
+            except Exception as e:
+                logger.exception(f"AI job for call {job.call_id} crashed in worker {index}: {e}")
+                state = JobState.FAILED
+                self.stats.failed += 1
+            finally:
+                # On cancellation the lease is kept and expires for recovery
+                self._running.discard(job.call_id)
+                self.stats.total_run_seconds += time.monotonic() - started
+
+            try:
+                await self.store.finish(job.job_id, self.owner, state)
+            except Exception as e:
+                logger.error(f"Failed to mark AI job {job.job_id} as {state.value}: {e}")
+            self._poke.set()
+
+    def start(self):
+        """
+        Starts the feeder and worker pool. Called from the app lifespan.
+        """
+        if self._tasks:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._poke = asyncio.Event()
+        self._feeder = asyncio.create_task(self._feed())
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self, drain_timeout: float):
+        """
+        Stops claiming, lets workers finish locally claimed and in-flight jobs
+        for up to `drain_timeout` seconds, then cancels whatever is still
+        running and hands its jobs back to the queue.
+        """
+        if not self._tasks:
+            return
+        self._feeder.cancel()
+        await asyncio.gather(self._feeder, return_exceptions=True)
+
+        self._closing = True
+        self._wakeup.set()
+        done, pending = await asyncio.wait(self._tasks, timeout=drain_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        if pending or self._depth:
+            released = await self.store.release(self.owner)
+            logger.warning(f"AI job queue stopped early; released {released} jobs back to the queue")
+        self._buckets.clear()
+        self._depth = 0
+        self._tasks = []
+        self._feeder = None
+        self._wakeup = None
+        self._poke = None
+
+# Singleton instance
+ai_jobs = AIJobQueue(
+    handler=ai_processor.process_call_background,
+    workers=settings.AI_WORKERS,
+    lease_seconds=settings.AI_JOB_LEASE_SECONDS,
+    poll_interval=settings.AI_JOB_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from sqlalchemy import insert, update
+from app.core.config import settings
+from app.db.models import Call, Packet
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+async def write_packets(batch: Dict[str, List[dict]], call_values: Optional[Dict[str, dict]] = None):
+    """
+    Bulk-inserts packet rows grouped by call_id in a single transaction.
+
+    Each call's `last_sequence` is raised to the highest sequence in the batch
+    within the same transaction, so the stored high-water mark never points past
+    packets that are not committed yet. `call_values` carries extra per-call
+    column updates (e.g. gap stats) to apply in the same commit.
+    """
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            rows = [row for call_rows in batch.values() for row in call_rows]
+            if rows:
+                await session.execute(insert(Packet), rows)
+
+            for call_id, call_rows in batch.items():
+                highest = max(row["sequence"] for row in call_rows)
+                await session.execute(
+                    update(Call)
+                    .where(Call.call_id == call_id, Call.last_sequence < highest)
+                    .values(last_sequence=highest)
+                )
+
+            for call_id, values in (call_values or {}).items():
+                await session.execute(update(Call).where(Call.call_id == call_id).values(**values))
+
+@dataclass
+class FlushStats:
+    """
+    Counters describing buffer flushes, used to tune batch size and delay.
+    """
+    flushes: int = 0
+    failed_flushes: int = 0
+    packets_flushed: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    total_flush_seconds: float = 0.0
+    max_flush_seconds: float = 0.0
+
+    def record(self, batch_size: int, seconds: float):
+        self.flushes += 1
+        self.packets_flushed += batch_size
+        self.last_batch_size = batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.total_flush_seconds += seconds
+        self.max_flush_seconds = max(self.max_flush_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "packets_flushed": self.packets_flushed,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": self.packets_flushed / self.flushes if self.flushes else 0.0,
+            "avg_flush_ms": 1000 * self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+            "max_flush_ms": 1000 * self.max_flush_seconds,
+        }
+
+class PacketBuffer:
+    """
+    Write-behind buffer for call packets.
+
+    Packets are queued per call and written to the `packets` table with one
+    multi-row INSERT per flush, inside a single transaction. A flush happens when
+    `max_batch_size` packets are pending, every `max_delay` seconds, or when
+    requested explicitly (end of call, shutdown).
+    """
+
+    def __init__(self, max_batch_size: int, max_delay: float, max_pending: int):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.stats = FlushStats()
+
+        self._queues: Dict[str, List[dict]] = {}
+        self._call_values: Dict[str, dict] = {}
+        self._pending = 0
+        self._flush_requested = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def under_pressure(self) -> bool:
+        """
+        True when the DB writer is falling behind (buffer more than half full).
+        """
+        return self._pending >= self.max_pending // 2
+
+    async def wait_for_capacity(self):
+        """
+        Waits until the buffer is no longer under pressure.
+
+        Used by streaming producers to withhold credit instead of piling up
+        packets; the waiter drives the flush itself so it never depends on the
+        background flusher being scheduled.
+        """
+        while self.under_pressure:
+            await self.flush()
+
+    async def add(self, packets: List[dict]):
+        """
+        Queues packet rows (`call_id`, `sequence`, `data`, `timestamp`) for the next flush.
+
+        Only blocks when the buffer is full, in which case the caller waits for
+        a flush (backpressure instead of unbounded memory growth).
+        """
+        if self._pending >= self.max_pending:
+            await self.flush()
+        for packet in packets:
+            self.enqueue(packet)
+
+    def enqueue(self, packet: dict):
+        """
+        Queues a single packet row without backpressure.
+        """
+        self._queues.setdefault(packet["call_id"], []).append(packet)
+        self._pending += 1
+
+        if self._pending >= self.max_batch_size:
+            self._flush_requested.set()
+
+    def set_call_values(self, call_id: str, values: dict):
+        """
+        Stages column updates for a call row, written with the next flush.
+        """
+        self._call_values[call_id] = values
+
+    async def flush(self, call_id: Optional[str] = None) -> int:
+        """
+        Writes pending packets (all calls, or only `call_id`) to the database.
+
+        When this returns, every packet queued before the call has been
+        committed. Returns the number of packets written.
+        """
+        async with self._write_lock:
+            if call_id is None:
+                batch, self._queues = self._queues, {}
+                call_values, self._call_values = self._call_values, {}
+            else:
+                rows = self._queues.pop(call_id, None)
+                batch = {call_id: rows} if rows else {}
+                values = self._call_values.pop(call_id, None)
+                call_values = {call_id: values} if values else {}
+
+            count = sum(len(rows) for rows in batch.values())
+            if not count and not call_values:
+                return 0
+            self._pending -= count
+
+            start = time.perf_counter()
+            try:
+                await write_packets(batch, call_values)
+            except Exception:
+                # Re-queue ahead of newer packets so the next flush retries them
+                for cid, rows in batch.items():
+                    self._queues[cid] = rows + self._queues.get(cid, [])
+                for cid, values in call_values.items():
+                    self._call_values.setdefault(cid, values)
+                self._pending += count
+                self.stats.failed_flushes += 1
+                raise
+
+            if count:
+                self.stats.record(count, time.perf_counter() - start)
+            return count
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            if self._pending or self._call_values:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Packet buffer flush failed, will retry: {e}")
+
+    def start(self):
+        """
+        Starts the background flusher. Called from the app lifespan.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops the background flusher and writes everything still pending.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+# Singleton instance
+packet_buffer = PacketBuffer(
+    max_batch_size=settings.PACKET_BUFFER_MAX_BATCH_SIZE,
+    max_delay=settings.PACKET_BUFFER_MAX_DELAY_MS / 1000,
+    max_pending=settings.PACKET_BUFFER_MAX_PENDING,
+)
@@ -1,18 +1,55 @@
 import logging
 import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, before_log, after_log
+from sqlalchemy import update
 from sqlalchemy.future import select
+from app.core.config import settings
 from app.services.mock_ai import ai_service, AIServiceUnavailable
-from app.db.models import Call
+from app.db.models import Call, Packet
 from app.core.states import CallState
 from app.db.session import AsyncSessionLocal
+from app.services.call_sessions import call_sessions
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class Window:
+    """
+    A size-bounded, contiguous run of a call's packets sent to the AI in one request.
+    """
+    first_sequence: int
+    last_sequence: int
+    text: str
+
+def merge_results(results: List[Tuple[int, dict]]) -> dict:
+    """
+    Merges per-window AI results, given as (window size in chars, result) in
+    sequence order: transcripts are joined and the sentiment is the one
+    covering the most characters of the call.
+    """
+    weights = Counter()
+    for size, result in results:
+        weights[result["sentiment"]] += size
+    return {
+        "transcript": " ".join(result["transcript"] for _, result in results),
+        "sentiment": weights.most_common(1)[0][0] if weights else None,
+    }
+
 class AIProcessor:
     """
     Handles buffering and processing of call data with robust retries.
+
+    Packets are streamed from the DB in keyset-paginated chunks and assembled
+    into size-bounded windows, so peak memory depends on the chunk and window
+    size rather than on the length of the call.
     """
+
+    def __init__(self, chunk_size: int, window_max_chars: int):
+        self.chunk_size = chunk_size
+        self.window_max_chars = window_max_chars
     
     @retry(
         retry=retry_if_exception_type(AIServiceUnavailable),
@@ -25,53 +62,106 @@ class AIProcessor:
     async def _call_ai_service_with_retry(self, text: str):
         return await ai_service.transcribe(text)
 
-    async def process_call_background(self, call_id: str):
+    async def _iter_packet_chunks(self, call_id: str, after: Optional[int] = None) -> AsyncIterator[list]:
         """
-        Background task to process the call content.
-        Fetches call packets (mock logic), sends to AI, and updates DB.
+        Yields (sequence, data) rows in sequence order, `chunk_size` at a time.
+
+        Each chunk is a short keyset query (`sequence > last seen`) on its own
+        session rather than one long-lived cursor, so no connection is held
+        while windows are out at the AI service.
+        """
+        while True:
+            query = select(Packet.sequence, Packet.data).where(Packet.call_id == call_id)
+            if after is not None:
+                query = query.where(Packet.sequence > after)
+            query = query.order_by(Packet.sequence).limit(self.chunk_size)
+
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(query)).all()
+            if not rows:
+                return
+            yield rows
+            after = rows[-1].sequence
+
+    async def _iter_windows(self, call_id: str, after: Optional[int] = None) -> AsyncIterator[Window]:
+        """
+        Assembles streamed packets into windows of at most `window_max_chars`
+        (a single oversized packet still gets a window of its own).
+        """
+        parts: List[str] = []
+        size = 0
+        first = last = None
+        async for chunk in self._iter_packet_chunks(call_id, after):
+            for sequence, data in chunk:
+                if parts and size + len(data) > self.window_max_chars:
+                    yield Window(first, last, "".join(parts))
+                    parts, size, first = [], 0, None
+                if first is None:
+                    first = sequence
+                parts.append(data)
+                size += len(data)
+                last = sequence
+        if parts:
+            yield Window(first, last, "".join(parts))
+
+    async def _update_call(self, call_id: str, **values) -> bool:
+        """
+        Applies a short state-transition write and mirrors the status in memory.
+        Returns False if the call does not exist.
         """
         async with AsyncSessionLocal() as session:
-            try:
-                # 1. Fetch Call
-                result = await session.execute(select(Call).where(Call.call_id == call_id))
-                call = result.scalars().first()
-                if not call:
-                    logger.error(f"Call {call_id} not found for processing")
-                    return
+            result = await session.execute(update(Call).where(Call.call_id == call_id).values(**values))
+            await session.commit()
+        if result.rowcount and "status" in values:
+            call_sessions.set_status(call_id, values["status"])
+        return bool(result.rowcount)
 
-                # Transition State: PROCESSING_AI
-                call.status = CallState.PROCESSING_AI
-                await session.commit()
-                
-                # 2. Simulate aggregating packet data
-                # In a real app, you'd fetch all packets from the DB
-                # query = select(Packet).where(Packet.call_id == call_id).order_by(Packet.sequence)
-                # packets = (await session.execute(query)).scalars().all()
-                # full_text = "".join([p.data for p in packets])
-                
-                # Mock aggregation for now since we are just testing the processing flow
-                full_text = "Simulated aggregated call content for analysis."
+    async def process_call_background(self, call_id: str):
+        """
+        Background task to process the call content.
+        Streams call packets into windows, sends each to AI, and updates DB
+        with the merged result.
+
+        DB sessions are only held for the state-transition writes, never across
+        the AI call and its retries.
+        """
+        # 1. Transition State: PROCESSING_AI
+        if not await self._update_call(call_id, status=CallState.PROCESSING_AI):
+            logger.error(f"Call {call_id} not found for processing")
+            return
 
+        try:
+            # 2. Stream packets in sequence order and transcribe window by window
+            results = []
+            async for window in self._iter_windows(call_id):
                 # 3. Call AI Service with Retry
-                ai_result = await self._call_ai_service_with_retry(full_text)
-                
-                # 4. Success: Update Call with result and COMPLETE/ARCHIVE
-                call.transcript = ai_result["transcript"]
-                call.sentiment = ai_result["sentiment"]
-                call.status = CallState.ARCHIVED # Or COMPLETED, per requirement
-                
-                logger.info(f"Successfully processed call {call_id}")
-                
-            except AIServiceUnavailable:
-                logger.error(f"Failed to process call {call_id} after retries")
-                call.status = CallState.FAILED
+                # Keep only the size, not the window text, so memory stays bounded
+                results.append((len(window.text), await self._call_ai_service_with_retry(window.text)))
             
-            except Exception as e:
-                logger.exception(f"Unexpected error processing call {call_id}: {e}")
-                call.status = CallState.FAILED
+            if not results:
+                logger.warning(f"Call {call_id} has no packets to analyze")
+            ai_result = merge_results(results)
             
-            finally:
-                await session.commit()
+        except AIServiceUnavailable:
+            logger.error(f"Failed to process call {call_id} after retries")
+            await self._update_call(call_id, status=CallState.FAILED)
+        
+        except Exception as e:
+            logger.exception(f"Unexpected error processing call {call_id}: {e}")
+            await self._update_call(call_id, status=CallState.FAILED)
+        
+        else:
+            # 4. Success: Update Call with result and COMPLETE/ARCHIVE
+            await self._update_call(
+                call_id,
+                transcript=ai_result["transcript"],
+                sentiment=ai_result["sentiment"],
+                status=CallState.ARCHIVED, # Or COMPLETED, per requirement
+            )
+            logger.info(f"Successfully processed call {call_id} in {len(results)} windows")
 
 # Singleton
-ai_processor = AIProcessor()
+ai_processor = AIProcessor(
+    chunk_size=settings.AI_PACKET_CHUNK_SIZE,
+    window_max_chars=settings.AI_WINDOW_MAX_CHARS,
+)
@@ -0,0 +1,147 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of offering a packet to the window
+ACCEPTED = "accepted"    # next expected sequence, released immediately
+HELD = "held"            # early arrival, waiting for the gap before it to fill
+LATE = "late"            # filled a gap that had already been declared missing
+DUPLICATE = "duplicate"  # sequence already seen, dropped
+
+class ReorderWindow:
+    """
+    Per-call reorder window that releases packets in sequence order.
+
+    `base` is the highest sequence already released (or skipped as missing).
+    Early arrivals are held in a dict while a bitmap (a Python int, bit i meaning
+    `base + 1 + i` was received) tracks which slots are filled, so dedup and
+    contiguity checks are O(1). A gap is skipped and recorded as missing when it
+    stays open longer than `gap_timeout`, or when a packet lands beyond `size`.
+    """
+
+    def __init__(self, base: int = 0, size: int = 1024, gap_timeout: float = 2.0):
+        self.base = base
+        self.size = size
+        self.gap_timeout = gap_timeout
+        self.duplicates = 0
+        self.late = 0
+        self.missing_ranges: List[List[int]] = []
+
+        self._received = 0
+        self._held: Dict[int, dict] = {}
+        self._gap_since: Optional[float] = None
+
+    @property
+    def held(self) -> int:
+        return len(self._held)
+
+    @property
+    def missing(self) -> int:
+        return sum(end - start + 1 for start, end in self.missing_ranges)
+
+    def stats(self) -> dict:
+        return {
+            "missing_packets": self.missing,
+            "duplicate_packets": self.duplicates,
+            "missing_ranges": [list(r) for r in self.missing_ranges],
+        }
+
+    def offer(self, sequence: int, packet: dict, now: Optional[float] = None) -> Tuple[str, List[dict]]:
+        """
+        Records a packet and returns (outcome, packets released in order).
+        """
+        now = time.monotonic() if now is None else now
+        released = self.expire(now)
+
+        if sequence <= self.base:
+            if self._fill_missing(sequence):
+                self.late += 1
+                return LATE, released + [packet]
+            self.duplicates += 1
+            return DUPLICATE, released
+
+        if sequence - self.base > self.size:
+            # Too far ahead: slide the window, giving up on the oldest gaps
+            released += self._skip_to(sequence - self.size)
+
+        bit = 1 << (sequence - self.base - 1)
+        if self._received & bit:
+            self.duplicates += 1
+            return DUPLICATE, released
+
+        self._received |= bit
+        self._held[sequence] = packet
+        in_order = sequence == self.base + 1
+        released += self._release_contiguous()
+
+        if self._held and self._gap_since is None:
+            self._gap_since = now
+        return (ACCEPTED if in_order else HELD), released
+
+    def expire(self, now: Optional[float] = None) -> List[dict]:
+        """
+        Skips the oldest gap if it has been open longer than `gap_timeout`.
+        """
+        if self._gap_since is None:
+            return []
+        now = time.monotonic() if now is None else now
+        if now - self._gap_since < self.gap_timeout:
+            return []
+        released = self._skip_to(min(self._held) - 1)
+        # The next gap (if any) starts its own timer
+        self._gap_since = now if self._held else None
+        return released
+
+    def drain(self) -> List[dict]:
+        """
+        Releases everything still held, recording the remaining gaps as missing.
+        """
+        if not self._held:
+            return []
+        return self._skip_to(max(self._held))
+
+    def _release_contiguous(self) -> List[dict]:
+        released = []
+        while self._received & 1:
+            self._received >>= 1
+            self.base += 1
+            released.append(self._held.pop(self.base))
+        if not self._held:
+            self._gap_since = None
+        return released
+
+    def _skip_to(self, new_base: int) -> List[dict]:
+        """
+        Moves `base` to `new_base`, releasing held packets and recording the
+        unfilled sequences in between as missing.
+        """
+        released = []
+        cursor = self.base
+        for sequence in sorted(s for s in self._held if s <= new_base):
+            if sequence > cursor + 1:
+                self._record_missing(cursor + 1, sequence - 1)
+            released.append(self._held.pop(sequence))
+            cursor = sequence
+        if new_base > cursor:
+            self._record_missing(cursor + 1, new_base)
+
+        self._received >>= new_base - self.base
+        self.base = new_base
+        return released + self._release_contiguous()
+
+    def _record_missing(self, start: int, end: int):
+        logger.warning(f"Packet gap declared missing: sequences {start}-{end}")
+        if self.missing_ranges and self.missing_ranges[-1][1] == start - 1:
+            self.missing_ranges[-1][1] = end
+        else:
+            self.missing_ranges.append([start, end])
+
+    def _fill_missing(self, sequence: int) -> bool:
+        for i, (start, end) in enumerate(self.missing_ranges):
+            if start <= sequence <= end:
+                pieces = [[start, sequence - 1], [sequence + 1, end]]
+                self.missing_ranges[i:i + 1] = [p for p in pieces if p[0] <= p[1]]
+                return True
+        return False
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+import logging
+import json
+from app.api.call_stream import PacketPayload
+from app.core.config import settings
+from app.services.call_sessions import call_sessions
+from app.services.ingest import accept_packet, complete_call, CallNotFound
+from app.services.packet_buffer import packet_buffer
+from app.services.job_queue import ai_jobs
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.websocket("/ws/call/{call_id}")
+async def websocket_call_ingest(websocket: WebSocket, call_id: str):
+    """
+    WebSocket endpoint streaming one call's packets over a single connection.
+
+    Protocol (JSON text frames):
+    - client: {"type": "packet", "sequence": int, "data": str, "timestamp": float}
+    - client: {"type": "end", "priority": int (optional)}  (same path as POST /v1/call/{call_id}/end)
+    - server: {"type": "ack", "ack": <highest contiguous sequence>, "limit": <packet count>}
+    - server: {"type": "ended", "status": str, "state": str}
+    - server: {"type": "error", "detail": str}
+
+    Flow control is credit based: the client may keep sending while the number
+    of packets it has sent on this connection is below the last `limit`.
+    Credit is withheld while the packet buffer is under pressure.
+    """
+    await websocket.accept()
+    try:
+        session = await call_sessions.get_or_create(call_id)
+    except RuntimeError as e:
+        logger.error(f"Could not open call stream for {call_id}: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+
+    window = settings.WS_INGEST_CREDIT_WINDOW
+    ack_interval = settings.WS_INGEST_ACK_INTERVAL
+    received = 0
+    limit = window
+
+    await websocket.send_json({"type": "ack", "ack": session.last_sequence, "limit": limit})
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+
+            kind = message.get("type")
+            if kind == "packet":
+                received += 1
+                if received > limit:
+                    await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Credit exceeded")
+                    return
+
+                try:
+                    payload = PacketPayload.model_validate(message)
+                except ValidationError as e:
+                    await websocket.send_json({"type": "error", "detail": e.errors(include_url=False)})
+                    continue
+
+                # The reorder window tracks the highest contiguous sequence for acks
+                session, _ = await accept_packet(call_id, payload.sequence, payload.data, payload.timestamp)
+
+                if received % ack_interval == 0:
+                    # Backpressure: no new credit until the DB writer catches up
+                    await packet_buffer.wait_for_capacity()
+                    limit = received + window
+                    await websocket.send_json({"type": "ack", "ack": session.last_sequence, "limit": limit})
+
+            elif kind == "end":
+                priority = message.get("priority", 0)
+                try:
+                    completed, state = await complete_call(call_id, priority if isinstance(priority, int) else 0)
+                except CallNotFound:
+                    await websocket.send_json({"type": "error", "detail": "Call not found"})
+                    await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+                    return
+
+                if completed:
+                    ai_jobs.notify()
+                await websocket.send_json({
+                    "type": "ended",
+                    "status": "processing_initiated" if completed else "already_completed",
+                    "state": state,
+                    "ack": session.last_sequence,
+                })
+                await websocket.close()
+                return
+
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unknown frame type: {kind}"})
+
+    except WebSocketDisconnect:
+        logger.info(f"Call stream for {call_id} disconnected after {received} packets")
+    except Exception as e:
+        logger.error(f"Unexpected call stream error for {call_id}: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
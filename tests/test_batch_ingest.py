@@ -0,0 +1,75 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.future import select
+from app.main import app
+from app.db.session import engine
+from app.db.base import Base
+from app.db.models import Call, Packet
+from sqlalchemy.ext.asyncio import AsyncSession
+import pytest_asyncio
+
+@pytest_asyncio.fixture(scope="module")
+async def test_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+@pytest.mark.asyncio
+async def test_batch_ingest_reports_per_packet_results(test_db, async_client):
+    """
+    One request carries packets for two calls, including a repeat and a gap.
+    The packet after the gap is held for reordering rather than stored.
+    """
+    packets = [
+        {"call_id": "batch-call-a", "sequence": 1, "data": "a1", "timestamp": 1.0},
+        {"call_id": "batch-call-b", "sequence": 1, "data": "b1", "timestamp": 1.0},
+        {"call_id": "batch-call-a", "sequence": 2, "data": "a2", "timestamp": 2.0},
+        {"call_id": "batch-call-a", "sequence": 2, "data": "a2", "timestamp": 2.0},
+        {"call_id": "batch-call-b", "sequence": 3, "data": "b3", "timestamp": 3.0},
+    ]
+
+    response = await async_client.post("/v1/call/stream", json={"packets": packets})
+    assert response.status_code == 200
+
+    body = response.json()
+    assert [r["result"] for r in body["results"]] == [
+        "accepted", "accepted", "accepted", "duplicate", "out_of_order"
+    ]
+    assert (body["accepted"], body["duplicate"], body["out_of_order"]) == (3, 1, 1)
+
+    # Written synchronously: visible without flushing the write-behind buffer
+    async with AsyncSession(engine) as session:
+        calls = (await session.execute(select(Call).order_by(Call.call_id))).scalars().all()
+        assert {c.call_id: c.last_sequence for c in calls if c.call_id.startswith("batch-")} == {
+            "batch-call-a": 2, "batch-call-b": 1
+        }
+
+        stored = (await session.execute(select(Packet).where(Packet.call_id.like("batch-%")))).scalars().all()
+        assert len(stored) == 3
+
+    # Filling the gap releases the held packet in order
+    response = await async_client.post("/v1/call/stream", json={"packets": [
+        {"call_id": "batch-call-b", "sequence": 2, "data": "b2", "timestamp": 2.0},
+    ]})
+    assert response.json()["accepted"] == 1
+
+    async with AsyncSession(engine) as session:
+        stored = (await session.execute(
+            select(Packet.sequence).where(Packet.call_id == "batch-call-b").order_by(Packet.id)
+        )).scalars().all()
+        assert stored == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_batch_ingest_rejects_empty_batch(test_db, async_client):
+    response = await async_client.post("/v1/call/stream", json={"packets": []})
+    assert response.status_code == 422
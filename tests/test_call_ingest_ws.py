@@ -0,0 +1,54 @@
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.future import select
+from app.main import app
+from app.db.session import engine
+from app.db.base import Base
+from app.db.models import Call, Packet
+from app.core.states import CallState
+from app.websocket import call_ingest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+async def _noop(call_id: str):
+    pass
+
+async def _reset_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+async def _load(call_id: str):
+    async with AsyncSession(engine) as session:
+        call = (await session.execute(select(Call).where(Call.call_id == call_id))).scalars().one()
+        packets = (await session.execute(select(Packet).where(Packet.call_id == call_id))).scalars().all()
+        return call, packets
+
+def test_websocket_stream_acks_and_end_of_call(monkeypatch):
+    """
+    A call streams packets over one socket, receives contiguous acks with fresh
+    credit, and the end frame completes the call like POST /end.
+    """
+    monkeypatch.setattr(call_ingest.ai_jobs, "handler", _noop)
+    monkeypatch.setattr(call_ingest.settings, "WS_INGEST_ACK_INTERVAL", 2)
+    call_id = "ws-ingest-call-001"
+
+    with TestClient(app) as client:
+        client.portal.call(_reset_db)
+        with client.websocket_connect(f"/stream/ws/call/{call_id}") as ws:
+            hello = ws.receive_json()
+            assert hello == {"type": "ack", "ack": 0, "limit": call_ingest.settings.WS_INGEST_CREDIT_WINDOW}
+
+            # Sequence 2 arrives before 1: the ack only covers the contiguous prefix
+            for seq in (2, 1):
+                ws.send_json({"type": "packet", "sequence": seq, "data": f"chunk {seq}", "timestamp": float(seq)})
+            ack = ws.receive_json()
+            assert ack["type"] == "ack" and ack["ack"] == 2 and ack["limit"] > 2
+
+            ws.send_json({"type": "end"})
+            ended = ws.receive_json()
+            assert ended["status"] == "processing_initiated"
+            assert ended["state"] == CallState.COMPLETED
+
+        call, packets = client.portal.call(_load, call_id)
+        assert call.status == CallState.COMPLETED
+        assert sorted(p.sequence for p in packets) == [1, 2]
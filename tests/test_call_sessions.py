@@ -0,0 +1,50 @@
+import pytest
+import asyncio
+from sqlalchemy.future import select
+from app.db.session import engine
+from app.db.base import Base
+from app.db.models import Call
+from app.core.states import CallState
+from app.services.call_sessions import CallSessionRegistry
+from sqlalchemy.ext.asyncio import AsyncSession
+import pytest_asyncio
+
+@pytest_asyncio.fixture(scope="module")
+async def test_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+@pytest.mark.asyncio
+async def test_concurrent_first_packets_share_one_load(test_db):
+    """
+    Simultaneous lookups for a new call create exactly one row and one session.
+    """
+    registry = CallSessionRegistry(max_size=10, ttl=60)
+    call_id = "session-test-call-001"
+
+    sessions = await asyncio.gather(*[registry.get_or_create(call_id) for _ in range(5)])
+    assert all(s is sessions[0] for s in sessions)
+    assert sessions[0].status == CallState.IN_PROGRESS
+    assert sessions[0].last_sequence == 0
+
+    async with AsyncSession(engine) as session:
+        calls = (await session.execute(select(Call).where(Call.call_id == call_id))).scalars().all()
+        assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_lru_bound_and_idle_ttl(test_db):
+    registry = CallSessionRegistry(max_size=2, ttl=60)
+    for i in range(3):
+        await registry.get_or_create(f"session-test-lru-{i}")
+
+    assert len(registry) == 2
+    assert registry.get("session-test-lru-0") is None
+
+    registry.ttl = 0
+    await asyncio.sleep(0.01)
+    assert registry.get("session-test-lru-2") is None
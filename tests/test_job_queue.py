@@ -0,0 +1,102 @@
+import pytest
+import asyncio
+import time
+from sqlalchemy import update
+from sqlalchemy.future import select
+from app.db.session import engine
+from app.db.base import Base
+from app.db.models import Call, Job
+from app.core.states import CallState, JobState
+from app.services.job_queue import AIJobQueue, JobStore
+from sqlalchemy.ext.asyncio import AsyncSession
+import pytest_asyncio
+
+@pytest_asyncio.fixture
+async def test_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+async def _add_calls(*call_ids, status=CallState.COMPLETED):
+    async with AsyncSession(engine) as session:
+        session.add_all([Call(call_id=call_id, status=status) for call_id in call_ids])
+        await session.commit()
+
+async def _job_states():
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(Job.call_id, Job.status))
+        return dict(result.all())
+
+@pytest.mark.asyncio
+async def test_tenants_are_served_round_robin_within_priority(test_db):
+    """
+    A burst from one tenant does not starve another; lower priority values run first.
+    """
+    order = []
+
+    async def handler(call_id: str):
+        order.append(call_id)
+
+    calls = ["acme:call-0", "acme:call-1", "acme:call-2", "globex:call-0", "initech:urgent"]
+    await _add_calls(*calls)
+
+    queue = AIJobQueue(handler=handler, workers=1, lease_seconds=60, poll_interval=0.05)
+    for call_id in calls[:4]:
+        assert await queue.submit(call_id)
+    assert await queue.submit("initech:urgent", priority=-1)
+    assert not await queue.submit("acme:call-0")  # already has an active job
+
+    # Claim everything up front so the local scheduler sees all tenants at once
+    for job in await queue.store.claim(queue.owner, limit=10, lease_seconds=60):
+        queue._enqueue(job)
+    queue.start()
+    await queue.stop(drain_timeout=5)
+
+    assert order == ["initech:urgent", "acme:call-0", "globex:call-0", "acme:call-1", "acme:call-2"]
+    assert set((await _job_states()).values()) == {JobState.DONE}
+
+@pytest.mark.asyncio
+async def test_concurrent_claimers_never_share_a_job(test_db):
+    call_ids = [f"claim-call-{i}" for i in range(20)]
+    await _add_calls(*call_ids)
+    store = JobStore()
+    for call_id in call_ids:
+        await store.add(call_id)
+
+    batches = await asyncio.gather(*[store.claim(f"worker-{i}", limit=3, lease_seconds=60) for i in range(10)])
+    claimed = [job.call_id for batch in batches for job in batch]
+    assert sorted(claimed) == sorted(call_ids)
+
+@pytest.mark.asyncio
+async def test_startup_recovers_expired_leases_and_orphaned_calls(test_db):
+    await _add_calls("orphan-call", "stuck-call")
+    await _add_calls("live-call", status=CallState.IN_PROGRESS)
+    store = JobStore()
+    await store.add("stuck-call")
+    await store.claim("dead-worker", limit=1, lease_seconds=60)
+
+    # The dead worker's lease runs out
+    async with AsyncSession(engine) as session:
+        await session.execute(update(Job).values(lease_expires_at=time.time() - 1))
+        await session.commit()
+
+    processed = []
+
+    async def handler(call_id: str):
+        processed.append(call_id)
+
+    queue = AIJobQueue(handler=handler, workers=2, lease_seconds=60, poll_interval=0.05, store=store)
+    await queue.recover()
+    queue.start()
+    for _ in range(100):
+        if len(processed) == 2:
+            break
+        await asyncio.sleep(0.02)
+    await queue.stop(drain_timeout=5)
+
+    assert sorted(processed) == ["orphan-call", "stuck-call"]
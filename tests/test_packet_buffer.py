@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.future import select
+from app.main import app
+from app.db.session import engine
+from app.db.base import Base
+from app.db.models import Call, Packet
+from app.services.packet_buffer import packet_buffer
+from sqlalchemy.ext.asyncio import AsyncSession
+import pytest_asyncio
+
+@pytest_asyncio.fixture(scope="module")
+async def test_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+@pytest.mark.asyncio
+async def test_buffered_packets_flush_in_one_batch(test_db, async_client):
+    """
+    Packets are acknowledged before being written, then land in a single flush
+    together with the call's sequence high-water mark.
+    """
+    call_id = "buffer-test-call-001"
+    await packet_buffer.flush()
+    flushes_before = packet_buffer.stats.flushes
+
+    for seq in range(1, 11):
+        response = await async_client.post(
+            f"/v1/call/stream/{call_id}",
+            json={"sequence": seq, "data": f"chunk {seq}", "timestamp": 100.0 + seq}
+        )
+        assert response.status_code == 202
+
+    assert packet_buffer.pending == 10
+    assert await packet_buffer.flush() == 10
+    assert packet_buffer.stats.flushes == flushes_before + 1
+    assert packet_buffer.stats.last_batch_size == 10
+
+    async with AsyncSession(engine) as session:
+        call = (await session.execute(select(Call).where(Call.call_id == call_id))).scalars().one()
+        assert call.last_sequence == 10
+
+        packets = (await session.execute(select(Packet).where(Packet.call_id == call_id))).scalars().all()
+        assert sorted(p.sequence for p in packets) == list(range(1, 11))
+
+@pytest.mark.asyncio
+async def test_end_call_flushes_pending_packets(test_db, async_client):
+    call_id = "buffer-test-call-002"
+
+    await async_client.post(f"/v1/call/stream/{call_id}", json={"sequence": 1, "data": "a", "timestamp": 1.0})
+    await async_client.post(f"/v1/call/stream/{call_id}", json={"sequence": 2, "data": "b", "timestamp": 2.0})
+
+    response = await async_client.post(f"/v1/call/{call_id}/end")
+    assert response.status_code == 200
+
+    async with AsyncSession(engine) as session:
+        packets = (await session.execute(select(Packet).where(Packet.call_id == call_id))).scalars().all()
+        assert len(packets) == 2
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy.future import select
+from app.db.session import engine
+from app.db.base import Base
+from app.db.models import Call, Packet
+from app.core.states import CallState
+from app.services.processor import AIProcessor
+from app.services import processor as processor_module
+from sqlalchemy.ext.asyncio import AsyncSession
+import pytest_asyncio
+
+@pytest_asyncio.fixture(scope="module")
+async def test_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+class RecordingAI:
+    """Deterministic stand-in for the mock AI service."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def transcribe(self, audio_data: str) -> dict:
+        self.requests.append(audio_data)
+        return {"transcript": f"<{audio_data}>", "sentiment": "negative" if "x" in audio_data else "positive"}
+
+@pytest.mark.asyncio
+async def test_packets_are_streamed_in_order_into_bounded_windows(test_db, monkeypatch):
+    """
+    Packets stored out of order are read back in sequence order, chunk by chunk,
+    and sent to the AI in windows no larger than the configured size.
+    """
+    call_id = "processor-test-call-001"
+    async with AsyncSession(engine) as session:
+        session.add(Call(call_id=call_id, status=CallState.COMPLETED))
+        # Stored out of order on purpose
+        for seq in [3, 1, 5, 2, 4, 6]:
+            session.add(Packet(call_id=call_id, sequence=seq, data="xx" if seq == 6 else f"p{seq}", timestamp=float(seq)))
+        await session.commit()
+
+    ai = RecordingAI()
+    monkeypatch.setattr(processor_module, "ai_service", ai)
+    processor = AIProcessor(chunk_size=2, window_max_chars=4)
+
+    await processor.process_call_background(call_id)
+
+    assert ai.requests == ["p1p2", "p3p4", "p5xx"]
+
+    async with AsyncSession(engine) as session:
+        call = (await session.execute(select(Call).where(Call.call_id == call_id))).scalars().one()
+        assert call.status == CallState.ARCHIVED
+        assert call.transcript == "<p1p2> <p3p4> <p5xx>"
+        assert call.sentiment == "positive"
@@ -6,6 +6,7 @@ from app.main import app
 from app.db.session import engine, get_db
 from app.db.base import Base
 from app.db.models import Call
+from app.services.packet_buffer import packet_buffer
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession
 import pytest_asyncio
@@ -55,6 +56,9 @@ async def test_race_condition_concurrent_packets(test_db, async_client):
     assert response1.status_code == 202
     assert response2.status_code == 202
     
+    # Packets are written behind; flush the buffer before inspecting the DB
+    await packet_buffer.flush()
+    
     # 2. Check Database State
     async with AsyncSession(engine) as session: # Direct session for verification
         # Verify only ONE Call object exists
@@ -0,0 +1,61 @@
+from app.services.reorder import ReorderWindow, ACCEPTED, HELD, LATE, DUPLICATE
+
+def _packet(seq):
+    return {"sequence": seq}
+
+def _released(packets):
+    return [p["sequence"] for p in packets]
+
+def test_early_arrivals_released_in_order():
+    window = ReorderWindow(base=0, size=16, gap_timeout=10)
+
+    assert window.offer(2, _packet(2), now=0) == (HELD, [])
+    assert window.offer(3, _packet(3), now=0) == (HELD, [])
+    outcome, released = window.offer(1, _packet(1), now=0)
+    assert outcome == ACCEPTED
+    assert _released(released) == [1, 2, 3]
+    assert window.base == 3 and window.held == 0
+
+def test_duplicates_are_dropped():
+    window = ReorderWindow(base=0, size=16, gap_timeout=10)
+    window.offer(1, _packet(1), now=0)
+    window.offer(3, _packet(3), now=0)
+
+    assert window.offer(1, _packet(1), now=0) == (DUPLICATE, [])
+    assert window.offer(3, _packet(3), now=0) == (DUPLICATE, [])
+    assert window.duplicates == 2
+
+def test_gap_timeout_records_missing_and_late_fill():
+    window = ReorderWindow(base=0, size=16, gap_timeout=1.0)
+    window.offer(1, _packet(1), now=0)
+    window.offer(4, _packet(4), now=0)
+
+    # Gap 2-3 expires on the next packet after the timeout
+    outcome, released = window.offer(5, _packet(5), now=2.0)
+    assert outcome == ACCEPTED
+    assert _released(released) == [4, 5]
+    assert window.missing_ranges == [[2, 3]]
+
+    outcome, released = window.offer(2, _packet(2), now=2.5)
+    assert outcome == LATE and _released(released) == [2]
+    assert window.missing_ranges == [[3, 3]]
+    assert window.missing == 1
+
+def test_window_slides_when_packet_lands_too_far_ahead():
+    window = ReorderWindow(base=0, size=4, gap_timeout=10)
+    window.offer(2, _packet(2), now=0)
+
+    outcome, released = window.offer(10, _packet(10), now=0)
+    assert outcome == HELD
+    assert _released(released) == [2]
+    assert window.base == 6
+    assert window.missing_ranges == [[1, 1], [3, 6]]
+
+def test_drain_releases_everything_held():
+    window = ReorderWindow(base=0, size=16, gap_timeout=10)
+    window.offer(3, _packet(3), now=0)
+    window.offer(5, _packet(5), now=0)
+
+    assert _released(window.drain()) == [3, 5]
+    assert window.missing_ranges == [[1, 2], [4, 4]]
+    assert window.base == 5